@@ -14,13 +14,58 @@ Description:
 """
 
 import os as _os
+from bisect import bisect_left as _bisect_left
 # import rlcompleter
 from cmd import Cmd as _Cmd
+from inspect import getattr_static as _getattr_static
+from operator import attrgetter as _attrgetter
+from weakref import WeakKeyDictionary as _WeakKeyDictionary
 from .utils import trim_docstring
 
+try:
+    import readline as _readline
+    _rl_buf = _readline.get_line_buffer
+    _rl_begidx = _readline.get_begidx
+    _rl_endidx = _readline.get_endidx
+except ImportError:  # no readline (e.g. plain Windows python), completion is never triggered
+    _rl_buf = lambda: ''
+    _rl_begidx = _rl_endidx = lambda: 0
+
 
 # misc functions / decorators
-# None Here
+_EXCLUDED_DO = frozenset({'do_EOF'})  # commands never offered by completedefault
+_TRIMMED_CACHE = _WeakKeyDictionary()  # function -> trimmed docstring, for repeated "help cmd"
+_get_doc = _attrgetter('__doc__')
+
+
+def _trimmed_doc(func):
+    """PEP 257 trimmed docstring of func, computed once per underlying function"""
+    func = getattr(func, '__func__', func)  # bound methods are rebuilt per lookup, key on the function
+    try:
+        return _TRIMMED_CACHE[func]
+    except KeyError:
+        trimmed = _TRIMMED_CACHE[func] = trim_docstring(str(func.__doc__))
+    except TypeError:  # not weak-referenceable
+        trimmed = trim_docstring(str(func.__doc__))
+    return trimmed
+
+
+def _prefixed(names, prefix):
+    """slice of the sorted tuple names that start with prefix, located by bisection"""
+    start = end = _bisect_left(names, prefix)
+    stop = len(names)
+    while end < stop and names[end].startswith(prefix):
+        end += 1
+    return names[start:end]
+
+
+def _static_doc(obj, name):
+    """docstring of obj.name, looked up without binding a method or firing descriptors"""
+    attr = _getattr_static(obj, name, None)
+    if isinstance(attr, (staticmethod, classmethod)):
+        attr = attr.__func__
+    return getattr(attr, '__doc__', None)
+
 
 # base level interpreters / mix-ins
 # all of these classes inherit from the base Cmd class.
@@ -28,7 +73,27 @@ from .utils import trim_docstring
 # for multiple inheritance use cases.
 
 
-class CacheCompleteMix(_Cmd):
+class _NameCacheMix(_Cmd):
+    """
+    cmd shell mix-in that caches the attribute names used for command lookup and completion.
+    like cmd.Cmd.get_names(), names come from the class, they are computed once per subclass.
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super(_NameCacheMix, cls).__init_subclass__(**kwargs)
+        names = dir(cls)  # sorted, no duplicates
+        cls._names = tuple(names)
+        cls._do_names = tuple(n for n in names if n.startswith('do_'))
+        cls._help_names = tuple(n for n in names if n.startswith('help_'))
+        docs = [(n, _static_doc(cls, n)) for n in cls._do_names]
+        cls._documented_cmds = frozenset(n for n, doc in docs if doc is not None)  # completion: any docstring
+        cls._help_cmds = frozenset(n for n, doc in docs if doc)  # help listing: non-empty docstring, as in cmd
+
+    def get_names(self):
+        return list(self._names)
+
+
+class CacheCompleteMix(_NameCacheMix):
     """
     cmd shell mix-in that provides caching for tab completion
     """
@@ -40,20 +105,21 @@ class CacheCompleteMix(_Cmd):
 
     # noinspection PyUnusedLocal
     def completedefault(self, text, line, begidx, endidx):
-        return [i[3:] for i in self.get_names() if i.startswith('do_') and 'EOF' not in i]
+        return [i[3:] for i in self._do_names if i not in _EXCLUDED_DO]
 
     def completenames(self, text, *ignored):
-        return [a[3:] for a in self.get_names() if
-                (a.startswith('do_' + text) and getattr(self, a).__doc__ is not None)]
+        documented = self._documented_cmds
+        return [a[3:] for a in _prefixed(self._do_names, 'do_' + text) if a in documented]
 
     def _cache_completion(self, key, text, line, begidx, endidx):
         try:
             # print('using cached names')
-            return [i for i in {opt for opt in self.__cache[key]} if i.startswith(text) and i not in line]
+            cached = self.__cache[key]
         except KeyError:
             # print('fetching names')
-            self.__cache[key] = self.completion_source(key)
-            return [i for i in {opt for opt in self.__cache[key]} if i.startswith(text) and i not in line]
+            cached = self.__cache[key] = frozenset(self.completion_source(key))
+        used = set(line.split())
+        return [i for i in cached if i.startswith(text) and i not in used]
 
 
 class ShellCmdMix(_Cmd):
@@ -83,48 +149,75 @@ class HideNoneDocMix(_Cmd):
             super(HideNoneDocMix, self).print_topics(header, cmds, cmdlen, maxcol)
 
 
-class AliasMix(_Cmd):
+class AliasMix(_NameCacheMix):
     """
-    interpreter that allows aliasing or commands using the ALIAS_PREFIX attribute
+    interpreter that allows aliasing or commands using the ALIAS_PREFIX attribute.
+    aliases defined on the class (e.g. alias_q = do_quit) seed the alias table,
+    aliases added at runtime only live in the table.
     """
     ALIAS_PREFIX = 'alias_'
     SHOW_ALIAS = False  # by default hides aliases from help
+    _HELP_COLS = (15, 80)  # (cmdlen, maxcol) passed to print_topics
+    _class_aliases = ()  # ALIAS_PREFIX attribute names defined on the class, set per subclass
+    _alias_names = None  # sorted alias names, rebuilt lazily and cleared when aliases change
+
+    def __init_subclass__(cls, **kwargs):
+        super(AliasMix, cls).__init_subclass__(**kwargs)
+        cls._class_aliases = tuple(n for n in cls._names if n.startswith(cls.ALIAS_PREFIX))
 
     def _wrap_alias(self, alias):
-        return '{}{}'.format(self.ALIAS_PREFIX, alias)
+        return self.ALIAS_PREFIX + alias
 
     def __init__(self, *args, **kwargs):
-        self.aliases = self.get_aliases()  # keep a set of strings of the alias names for caching purposes
+        plen = len(self.ALIAS_PREFIX)
+        # alias name -> command callable
+        self._alias_map = {n[plen:]: getattr(self, n) for n in self._class_aliases}
+        self.aliases = set(self._alias_map)  # keep a set of strings of the alias names for caching purposes
         super(AliasMix, self).__init__(*args, **kwargs)
 
     # noinspection PyUnusedLocal
     def completedefault(self, text, line, begidx, endidx):
-        return [i[3:] for i in self.get_names() if i.startswith('do_') and 'EOF' not in i]
+        return [i[3:] for i in self._do_names if i not in _EXCLUDED_DO]
 
     def completenames(self, text, *ignored):
-        names = self.get_names()
+        documented = self._documented_cmds
         # noinspection SpellCheckingInspection
-        cmds = [a[3:] for a in names if
-                a.startswith('do_' + text) and getattr(self, a).__doc__ is not None]
+        cmds = [a[3:] for a in _prefixed(self._do_names, 'do_' + text) if a in documented]
         if self.SHOW_ALIAS:
-            aliases = [a[6:] for a in names if
-                       a.startswith(self.ALIAS_PREFIX + text) and getattr(self, a).__doc__ is not None]
+            self._cached_aliases()
+            documented = self._documented_aliases
+            aliases = [a for a in _prefixed(self._alias_names, text) if a in documented]
         else:
             aliases = []
         return cmds + aliases
 
-    def get_names(self):
-        return dir(self)
+    def _cached_aliases(self):
+        """rebuild what is derived from the alias table if an alias changed since the last call"""
+        if self._alias_names is not None:
+            return
+        names = tuple(sorted(self._alias_map))
+        funcs = [self._alias_map[a] for a in names]
+        self._documented_aliases = frozenset(a for a, doc in zip(names, map(_get_doc, funcs)) if doc is not None)
+        # (alias, command) pairs for the 'alias' listing
+        self._alias_display = tuple(zip(names, [getattr(func, '__name__', '')[3:] for func in funcs]))
+        self._alias_names = names
 
     def get_aliases(self):
-        return {i[6:] for i in self.get_names() if i.startswith(self.ALIAS_PREFIX)}
+        return self._alias_map.keys()
+
+    def _aliases_changed(self):
+        """drop everything cached from the alias table"""
+        self._alias_names = None
 
     def default(self, line):
         cmd, arg, line = self.parseline(line)
-        func = [getattr(self, n, None) for n in self.get_names() if
-                (n == 'do_' + cmd) or (n == self._wrap_alias(cmd))]
-        if func:  # maybe check if exactly one or more elements, and tell the user
-            return func[0](arg)
+        func = None
+        if cmd:  # parseline() gives cmd None for e.g. '!' without do_shell
+            func = getattr(self, 'do_' + cmd, None)
+            if func is None:
+                func = self._alias_map.get(cmd)
+        if func is not None:
+            return func(arg)
         else:
             super(AliasMix, self).default(line)
             return None
@@ -136,24 +229,23 @@ class AliasMix(_Cmd):
 
         """
         if state == 0:
-            import readline
-            origline = readline.get_line_buffer()
+            origline = _rl_buf()
             line = origline.lstrip()
             stripped = len(origline) - len(line)
-            begidx = readline.get_begidx() - stripped
-            endidx = readline.get_endidx() - stripped
+            begidx = _rl_begidx() - stripped
+            endidx = _rl_endidx() - stripped
             if begidx > 0:
                 cmd, args, foo = self.parseline(line)
                 if cmd == '':
                     compfunc = self.completedefault
                 else:
-                    try:
-                        compfunc = getattr(self, 'complete_' + cmd)
-                    except AttributeError:
-                        try:
-                            compfunc = getattr(self, 'complete_' + getattr(self, self._wrap_alias(cmd)).__name__[3:])
-                        except AttributeError:
-                            compfunc = self.completedefault
+                    compfunc = getattr(self, 'complete_' + cmd, None)
+                    if compfunc is None:
+                        alias = self._alias_map.get(cmd)
+                        if alias is not None:
+                            compfunc = getattr(self, 'complete_' + getattr(alias, '__name__', '')[3:], None)
+                    if compfunc is None:
+                        compfunc = self.completedefault
             else:
                 compfunc = self.completenames
             # noinspection PyAttributeOutsideInit
@@ -172,49 +264,37 @@ class AliasMix(_Cmd):
                 func = getattr(self, 'help_' + arg)
             except AttributeError:
                 try:
-                    doc = getattr(self, 'do_' + arg).__doc__
-                    if doc:
-                        self.stdout.write("%s\n" % trim_docstring(str(doc)))
+                    func = getattr(self, 'do_' + arg)
+                    if func.__doc__:
+                        self.stdout.write("%s\n" % _trimmed_doc(func))
                         return
                 except AttributeError:
-                    try:
-                        doc = getattr(self, self._wrap_alias(arg)).__doc__
-                        if doc:
-                            self.stdout.write("%s\n" % trim_docstring(str(doc)))
-                            return
-                    except AttributeError:
-                        pass
+                    func = self._alias_map.get(arg)
+                    if func is not None and func.__doc__:
+                        self.stdout.write("%s\n" % _trimmed_doc(func))
+                        return
                 self.stdout.write("%s\n" % str(self.nohelp % (arg,)))
                 return
             func()
         else:
-            names = self.get_names()
+            help = {n[5:] for n in self._help_names}
+            documented = self._help_cmds
             cmds_doc = []
             cmds_undoc = []
-            help = {}
-            for name in names:
-                if name[:5] == 'help_':
-                    help[name[5:]] = 1
-            names.sort()
-            # There can be duplicates if routines overridden
-            prevname = ''
-            for name in names:
-                if name[:3] == 'do_':
-                    if name == prevname:
-                        continue
-                    prevname = name
-                    cmd = name[3:]
-                    if cmd in help:
-                        cmds_doc.append(cmd)
-                        del help[cmd]
-                    elif getattr(self, name).__doc__:
-                        cmds_doc.append(cmd)
-                    else:
-                        cmds_undoc.append(cmd)
+            for name in self._do_names:
+                cmd = name[3:]
+                if cmd in help or name in documented:
+                    cmds_doc.append(cmd)
+                else:
+                    cmds_undoc.append(cmd)
+            cmds = {n[3:] for n in self._do_names}
+            misc = [n[5:] for n in self._help_names if n[5:] not in cmds]
+            cols = self._HELP_COLS
+            print_topics = self.print_topics
             self.stdout.write("%s\n" % str(self.doc_leader))
-            self.print_topics(self.doc_header, cmds_doc, 15, 80)
-            self.print_topics(self.misc_header, list(help.keys()), 15, 80)
-            self.print_topics(self.undoc_header, cmds_undoc, 15, 80)
+            print_topics(self.doc_header, cmds_doc, *cols)
+            print_topics(self.misc_header, misc, *cols)
+            print_topics(self.undoc_header, cmds_undoc, *cols)
 
 
 # more specialized interpreters for ease of use.
@@ -260,33 +340,27 @@ class AliasCmdInterpreter(AliasMix):
             cmd = None
             try:
                 cmd = getattr(self, 'do_{}'.format(args[1]))
-            except (AttributeError, IndexError):
-                try:
-                    cmd = getattr(self, self._wrap_alias(args[1]))
-                except (AttributeError, IndexError):
-                    pass
-            new_alias = self._wrap_alias(args[0])
+            except AttributeError:
+                cmd = self._alias_map.get(args[1])
+            except IndexError:
+                pass
             if cmd is not None:
-                try:
-                    setattr(self, new_alias, cmd)
-                    self.aliases = self.get_aliases()
-                except Exception as e:
-                    self.stdout.write('failed to create alias.\n{}\n'.format(e))
-                    self.stdout.flush()
-            else:  # delete alias
-                try:
-                    delattr(self, new_alias)
-                    self.aliases = self.get_aliases()
-                except AttributeError:
-                    pass
+                self._alias_map[args[0]] = cmd
+                self.aliases.add(args[0])
+                self._aliases_changed()
+            elif self._alias_map.pop(args[0], None) is not None:  # delete alias
+                self.aliases.discard(args[0])
+                self._aliases_changed()
         else:
-            alias_str = ''.join('{}: {}\n'.format(alias, getattr(self, self._wrap_alias(alias)).__name__[3:])
-                                for alias in self.aliases)
+            self._cached_aliases()
+            alias_str = ''.join(['{}: {}\n'.format(alias, cmd) for alias, cmd in self._alias_display])
             if not suppress:
                 self.stdout.write(alias_str)
             else:
                 return alias_str
 
     def __default_alias(self, force=False):
-        if not hasattr(self, self._wrap_alias('a')) or force:
-            setattr(self, self._wrap_alias('a'), self.do_alias)
+        if 'a' not in self._alias_map or force:
+            self._alias_map['a'] = self.do_alias
+            self.aliases.add('a')
+            self._aliases_changed()
@@ -11,32 +11,34 @@ License: N/A
 Description: 
 """
 
+import re
 from sys import maxsize
 
+_INDENT_RE = re.compile(r'(\s*)\S')
+
 
 def trim_docstring(docstring):
     """trims docstring as specified in PEP 257
     https://www.python.org/dev/peps/pep-0257/"""
     if not docstring:
         return ''
+    # Single line without tabs (isprintable() is False for tabs and every line break):
+    if docstring.isprintable():
+        return docstring.strip()
     # Convert tabs to spaces (following the normal Python rules)
     # and split into a list of lines:
-    lines = docstring.expandtabs().splitlines()
-    # Determine minimum indentation (first line doesn't count):
-    indent = maxsize
-    for line in lines[1:]:
-        stripped = line.lstrip()
-        if stripped:
-            indent = min(indent, len(line) - len(stripped))
+    if '\t' in docstring:
+        docstring = docstring.expandtabs()
+    lines = docstring.splitlines()
+    # Determine minimum indentation (first line doesn't count, blank lines don't match):
+    match = _INDENT_RE.match
+    indent = min((len(m.group(1)) for m in map(match, lines[1:]) if m), default=maxsize)
     # Remove indentation (first line is special):
     trimmed = [lines[0].strip()]
     if indent < maxsize:
-        for line in lines[1:]:
-            trimmed.append(line[indent:].rstrip())
+        trimmed.extend(line[indent:].rstrip() for line in lines[1:])
     # Strip off trailing and leading blank lines:
-    while trimmed and not trimmed[-1]:
-        trimmed.pop()
-    while trimmed and not trimmed[0]:
-        trimmed.pop(0)
+    start = next((i for i, line in enumerate(trimmed) if line), len(trimmed))
+    end = next((i for i in range(len(trimmed), start, -1) if trimmed[i - 1]), start)
     # Return a single string:
-    return '\n'.join(trimmed)
+    return '\n'.join(trimmed[start:end])